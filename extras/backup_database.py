@@ -1,18 +1,27 @@
 """Backs up existing TextPAIR database (a table in PostGreSQL), along with web config and web files to a tarball file."""
 
+import hashlib
 import json
 import os
 import shutil
+import subprocess
 from argparse import ArgumentParser
 from configparser import ConfigParser
 from pathlib import Path
 
 import lz4.frame
+import orjson
 import psycopg2
 
 GLOBAL_CONFIG = ConfigParser()
 GLOBAL_CONFIG.read("/etc/text-pair/global_settings.ini")
 
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+WRITE_BUFFER_SIZE = 8 * 1024 * 1024
+SCHEMA_FINGERPRINTS_FILE = "schema_fingerprints.json"
+# Bump whenever table_schema_fingerprint changes, so restores ignore fingerprints computed the old way
+SCHEMA_FINGERPRINT_VERSION = 1
+
 
 def table_exists(user, password, table_name):
     conn = psycopg2.connect(database=GLOBAL_CONFIG.get("DATABASE", "database_name"), user=user, password=password)
@@ -23,6 +32,25 @@ def table_exists(user, password, table_name):
     return result if result else None
 
 
+def table_schema_fingerprint(cursor, table_name):
+    """
+    Hash a table's column definitions and indexes so restores can tell whether its schema changed.
+    Also used by restore_database.py, so both sides always compute fingerprints the same way.
+    """
+    cursor.execute(
+        "SELECT column_name, data_type, is_nullable, column_default FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = %s ORDER BY ordinal_position",
+        (table_name,)
+    )
+    columns = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s ORDER BY indexdef",
+        (table_name,)
+    )
+    indexes = cursor.fetchall()
+    return hashlib.sha256(orjson.dumps([columns, indexes])).hexdigest()
+
+
 def back_up_philo_db_data(philo_db_path, output_path):
     """Backs up the source data for a PhiloLogic database."""
     print(f"  - Backing up PhiloLogic database from {philo_db_path}")
@@ -90,13 +118,30 @@ def extract_textpair_database(table, web_app_path, output_path):
     ]
 
     print(f"Found {len(existing_tables)} tables to backup")
-    sql_files = []
+    dump_files = []
+    pg_env = {**os.environ, "PGPASSWORD": db_password}
     for table_name in existing_tables:
-        sql_file = f"textpair_{table_name}.sql"
-        sql_path = backup_dir / sql_file
+        dump_file = f"textpair_{table_name}.dump"
+        dump_path = backup_dir / dump_file
         print(f"  - Dumping table {table_name}...")
-        os.system(f"PGPASSWORD={db_password} pg_dump -U {db_user} {db_name} -t {table_name} > {sql_path}")
-        sql_files.append(sql_file)
+        # Custom format is restored with pg_restore, which loads data through COPY
+        subprocess.run(
+            ['pg_dump', '-Fc', '-U', db_user, '-t', table_name, '-f', str(dump_path), db_name],
+            check=True,
+            env=pg_env,
+        )
+        dump_files.append(dump_file)
+
+    # Record table schemas so a restore over identical tables can truncate them instead of dropping them
+    conn = psycopg2.connect(database=db_name, user=db_user, password=db_password)
+    with conn.cursor() as cursor:
+        schema_fingerprints = {
+            table_name: table_schema_fingerprint(cursor, table_name) for table_name in existing_tables
+        }
+    conn.close()
+    (backup_dir / SCHEMA_FINGERPRINTS_FILE).write_bytes(
+        orjson.dumps({"version": SCHEMA_FINGERPRINT_VERSION, "tables": schema_fingerprints})
+    )
     print("✓ Database tables backup complete\n")
 
     # Create tarball from temp directory
@@ -111,14 +156,18 @@ def extract_textpair_database(table, web_app_path, output_path):
         os.system(f"tar cf {temp_tar} {table}_textpair_backup")
 
         print("  - Compressing with LZ4...")
-        # Read the tar file and compress with lz4
-        with open(temp_tar, 'rb') as f:
-            tar_data = f.read()
-        compressed_data = lz4.frame.compress(tar_data, compression_level=3)
-
-        # Write the compressed data
-        with open(tar_path, 'wb') as f:
-            f.write(compressed_data)
+        # Stream the tar file through the lz4 compressor so neither copy is held in memory
+        # Large read chunks and output buffer keep the number of syscalls low on big backups.
+        # The tarball is hashed in the same pass so restores can verify it while extracting.
+        tar_hash = hashlib.sha256()
+        with open(temp_tar, 'rb') as tar_file, \
+                open(tar_path, 'wb', buffering=WRITE_BUFFER_SIZE) as output_file, \
+                lz4.frame.open(output_file, 'wb', compression_level=3) as lz4_file:
+            while chunk := tar_file.read(COPY_BUFFER_SIZE):
+                tar_hash.update(chunk)
+                lz4_file.write(chunk)
+        checksum_path = tar_path.with_suffix(".sha256")
+        checksum_path.write_text(f"{tar_hash.hexdigest()}\n")
 
         # Clean up temporary tar file
         os.remove(temp_tar)
@@ -132,6 +181,7 @@ def extract_textpair_database(table, web_app_path, output_path):
 
     print(f"\n✓ Backup completed successfully!")
     print(f"Backup archive created at: {tar_path}")
+    print(f"Checksum of the uncompressed archive written to: {checksum_path}")
 
 
 if __name__ == "__main__":
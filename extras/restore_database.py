@@ -1,33 +1,162 @@
 """Restores TextPAIR database and web files from a backup tarball, and rebuilds the web application."""
 
-import json
+import errno
+import fcntl
+import hashlib
 import os
 import shutil
 import subprocess
+import tarfile
+import tempfile
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
-from pathlib import Path
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
 
 import lz4.frame
+import orjson
 import psycopg2
+from psycopg2 import sql
+
+from backup_database import SCHEMA_FINGERPRINT_VERSION, SCHEMA_FINGERPRINTS_FILE, table_schema_fingerprint
 
 GLOBAL_CONFIG = ConfigParser()
 GLOBAL_CONFIG.read("/etc/text-pair/global_settings.ini")
 
+TAR_BUFFER_SIZE = 1024 * 1024
+
+# ioctl request number for cloning a file's extents (linux/fs.h)
+FICLONE = 0x40049409
+
 
 def check_database_connection(user, password):
-    """Test database connection and permissions."""
+    """
+    Test database connection and permissions.
+    Returns the open connection, in autocommit mode, so it can be reused for the restore,
+    or None if the connection failed.
+    """
     try:
         conn = psycopg2.connect(
             database=GLOBAL_CONFIG.get("DATABASE", "database_name"),
             user=user,
             password=password
         )
-        conn.close()
-        return True
+        conn.autocommit = True
+        return conn
     except psycopg2.OperationalError as e:
         print(f"Database connection error: {e}")
-        return False
+        return None
+
+
+class HashingReader:
+    """File-like wrapper computing the SHA-256 of a stream as it is read."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.hash.update(data)
+        return data
+
+    def drain(self):
+        """Read the rest of the stream, such as tar end-of-archive padding, so the digest covers all of it."""
+        while self.read(TAR_BUFFER_SIZE):
+            pass
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+def checked_members(members, dest):
+    """
+    Yield archive members, refusing absolute paths, ".." components, special files and links
+    pointing outside dest, like GNU tar. Used on Pythons without tarfile extraction filters.
+    """
+    dest = os.path.realpath(dest)
+
+    def inside_dest(path):
+        return os.path.commonpath([dest, os.path.realpath(path)]) == dest
+
+    for member in members:
+        name = PurePosixPath(member.name)
+        if name.is_absolute() or ".." in name.parts or not inside_dest(os.path.join(dest, member.name)):
+            raise Exception(f"Refusing to extract unsafe archive member: {member.name}")
+        if not (member.isfile() or member.isdir() or member.issym() or member.islnk()):
+            raise Exception(f"Refusing to extract special file from archive: {member.name}")
+        if member.issym():
+            link_target = os.path.join(dest, os.path.dirname(member.name), member.linkname)
+        elif member.islnk():
+            link_target = os.path.join(dest, member.linkname)
+        if (member.issym() or member.islnk()) and (
+            os.path.isabs(member.linkname) or not inside_dest(link_target)
+        ):
+            raise Exception(f"Refusing to extract link pointing outside the backup: {member.name}")
+        yield member
+
+
+def extract_members(tar, dest, members):
+    """Extract the given members of a streamed archive into dest, without letting any escape it."""
+    if hasattr(tarfile, "data_filter"):
+        tar.extractall(dest, members=members, filter="data")
+    else:
+        # Extraction filters only exist from Python 3.10.12 / 3.11.4 onwards
+        tar.extractall(dest, members=checked_members(members, dest))
+
+
+@contextmanager
+def open_backup_stream(backup_path):
+    """
+    Open a decompressed stream over an LZ4 backup tarball. When the lz4 command line tool is
+    available, decompression runs in its own process and overlaps with tar extraction.
+    """
+    if shutil.which('lz4') is None:
+        with lz4.frame.open(backup_path, 'rb') as lz4_file:
+            yield lz4_file
+        return
+
+    lz4_process = subprocess.Popen(['lz4', '-d', '-c', str(backup_path)], stdout=subprocess.PIPE)
+    try:
+        yield lz4_process.stdout
+        # tarfile stops reading at the end-of-archive marker: drain the padding so lz4 exits cleanly
+        while lz4_process.stdout.read(TAR_BUFFER_SIZE):
+            pass
+    except BaseException:
+        lz4_process.kill()
+        raise
+    finally:
+        lz4_process.stdout.close()
+        return_code = lz4_process.wait()
+    if return_code != 0:
+        raise Exception(f"LZ4 decompression failed with exit code {return_code}")
+
+
+def reflink_copy(src, dst):
+    """
+    Copy a file, cloning its extents on copy-on-write filesystems (btrfs, XFS) and
+    falling back to an in-kernel copy with copy_file_range elsewhere.
+    """
+    with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            remaining = os.fstat(src_file.fileno()).st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(src_file.fileno(), dst_file.fileno(), remaining)
+                    if copied == 0:
+                        # Some filesystems report no progress instead of raising
+                        break
+                    remaining -= copied
+            except OSError:
+                pass
+            if remaining > 0:
+                # copy_file_range failed or stalled on this filesystem: copy from where it stopped
+                shutil.copyfileobj(src_file, dst_file)
+    shutil.copystat(src, dst)
+    return dst
 
 
 def update_app_config(web_app_path):
@@ -43,8 +172,8 @@ def update_app_config(web_app_path):
             return False
 
         # Read the current config
-        with open(config_path) as f:
-            config = json.load(f)
+        with open(config_path, 'rb') as f:
+            config = orjson.loads(f.read())
 
         # Update the apiServer value
         api_server = GLOBAL_CONFIG.get("WEB_APP", "api_server")
@@ -63,8 +192,8 @@ def update_app_config(web_app_path):
             config['targetPhiloDBPath'] = ""
 
         # Write the updated config back
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        with open(config_path, 'wb') as f:
+            f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
 
         print(f"Updated appConfig.json:")
         print(f"  - apiServer: {api_server}")
@@ -79,23 +208,27 @@ def update_app_config(web_app_path):
         return False
 
 
-def run_npm_build(web_app_path):
+def run_npm_build(web_app_path, install_process=None):
     """
     Run npm install and build in the web app directory.
+    If install_process is given, npm install was already started in the background
+    and is waited on instead of being run again.
     Returns True if successful, False otherwise.
     """
     try:
-        # Change to web app directory
-        original_dir = os.getcwd()
-        os.chdir(web_app_path)
-
         # Run npm install
-        print("Running npm install...")
-        subprocess.run(['npm', 'install'], check=True)
+        if install_process is None:
+            print("Running npm install...")
+            subprocess.run(['npm', 'install'], check=True, cwd=web_app_path)
+        else:
+            print("Waiting for npm install to finish...")
+            return_code = install_process.wait()
+            if return_code != 0:
+                raise subprocess.CalledProcessError(return_code, install_process.args)
 
         # Run npm build
         print("Running npm run build...")
-        subprocess.run(['npm', 'run', 'build'], check=True)
+        subprocess.run(['npm', 'run', 'build'], check=True, cwd=web_app_path)
 
         return True
 
@@ -105,37 +238,88 @@ def run_npm_build(web_app_path):
     except Exception as e:
         print(f"Unexpected error during build process: {e}")
         return False
-    finally:
-        # Always return to original directory
-        os.chdir(original_dir)
 
 
-def check_existing_resources(db_name, db_user, db_password, web_app_dest, backup_dir):
+def scan_backup_dir(backup_dir):
+    """
+    List the extracted backup directory once and split it into table dumps (custom-format .dump
+    files, or plain .sql files from older backups) and web app directories.
+    """
+    dump_files = []
+    web_dirs = []
+    for entry in sorted(backup_dir.iterdir()):
+        if entry.is_dir():
+            web_dirs.append(entry)
+        elif entry.name.startswith("textpair_") and entry.suffix in (".dump", ".sql"):
+            dump_files.append(entry)
+    return dump_files, web_dirs
+
+
+def secondary_indexes(cursor, table_name):
+    """Return the names and definitions of a table's indexes that do not back a constraint."""
+    cursor.execute(
+        "SELECT index_class.relname, pg_get_indexdef(pg_index.indexrelid) FROM pg_index "
+        "JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid "
+        "JOIN pg_class table_class ON table_class.oid = pg_index.indrelid "
+        "WHERE table_class.relnamespace = current_schema()::regnamespace AND table_class.relname = %s "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE pg_constraint.conindid = pg_index.indexrelid)",
+        (table_name,)
+    )
+    return cursor.fetchall()
+
+
+def restore_table(dump_file, db_name, db_user, db_password, data_only=False, index_definitions=()):
+    """
+    Restore a single table dump with pg_restore, or psql for plain SQL dumps.
+    With data_only, only the rows are loaded into the existing (truncated) table, after which
+    the given index definitions are rebuilt: loading first and indexing afterwards is much faster.
+    """
+    if dump_file.suffix == ".dump":
+        # Ownership and grants name roles from the backup host, which may not exist here
+        command = ['pg_restore', '--no-owner', '--no-privileges', '-U', db_user, '-d', db_name, str(dump_file)]
+        if data_only:
+            command.insert(1, '--data-only')
+    else:
+        # Plain dumps replay OWNER TO / GRANT statements for roles that may not exist here:
+        # like pg_restore --no-owner, let psql carry on past those errors so the COPY still runs
+        command = ['psql', '-U', db_user, '-d', db_name, '-f', str(dump_file)]
+    subprocess.run(command, check=True, env={**os.environ, "PGPASSWORD": db_password})
+    if index_definitions:
+        conn = psycopg2.connect(database=db_name, user=db_user, password=db_password)
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                for index_definition in index_definitions:
+                    cursor.execute(index_definition)
+        finally:
+            conn.close()
+    print(f"  ✓ Table {dump_file.stem.replace('textpair_', '')} restored")
+
+
+def check_existing_resources(conn, web_app_dest, dump_files, web_dirs):
     """Check for existing database tables and web app directory."""
     existing_resources = []
 
     # Check for existing tables
-    sql_files = list(backup_dir.glob("textpair_*.sql"))
-    for sql_file in sql_files:
-        table_name = sql_file.stem.replace('textpair_', '')
-        with psycopg2.connect(database=db_name, user=db_user, password=db_password) as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(
-                    "SELECT 1 FROM information_schema.tables WHERE table_name = %s",
-                    (table_name,)
-                )
-                if cursor.fetchone() is not None:
-                    existing_resources.append(f"database table '{table_name}'")
+    table_names = [dump_file.stem.replace('textpair_', '') for dump_file in dump_files]
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_name = ANY(%s)",
+            (table_names,)
+        )
+        existing_tables = {row[0] for row in cursor.fetchall()}
+    for table_name in table_names:
+        if table_name in existing_tables:
+            existing_resources.append(f"database table '{table_name}'")
 
     # Check for existing web app directory
-    web_dirs = [d for d in backup_dir.iterdir() if d.is_dir()]
     if web_dirs and (web_app_dest / web_dirs[0].name).exists():
         existing_resources.append(f"web application directory '{web_dirs[0].name}'")
 
     return existing_resources
 
 
-def restore_textpair_database(backup_path, web_app_dest=None, force=False):
+def restore_textpair_database(backup_path, web_app_dest=None, force=False, skip_web_app=False):
     """
     Restore TextPAIR database and web files from a backup tarball.
 
@@ -144,6 +328,8 @@ def restore_textpair_database(backup_path, web_app_dest=None, force=False):
         web_app_dest: Optional destination for web app files. If not provided,
                      uses the path from global_settings.ini
         force: If True, overwrite existing files/tables without prompting
+        skip_web_app: If True, only restore the database tables: web app files are
+                     skipped during extraction and never written to disk
     """
     print(f"\nStarting TextPAIR restoration from: {backup_path}")
 
@@ -153,39 +339,75 @@ def restore_textpair_database(backup_path, web_app_dest=None, force=False):
 
     # Check database connection before proceeding
     print("\nChecking database connection...")
-    if not check_database_connection(db_user, db_password):
+    conn = check_database_connection(db_user, db_password)
+    if conn is None:
         raise Exception("Cannot connect to database. Please check credentials and permissions.")
     print("✓ Database connection verified")
 
     backup_path = Path(backup_path)
     if not backup_path.exists():
+        conn.close()
         raise FileNotFoundError(f"Backup file not found: {backup_path}")
+    checksum_path = backup_path.with_suffix(".sha256")
 
-    # Create temporary directory for extraction
-    print("\nPreparing temporary workspace...")
-    temp_dir = Path("/tmp/textpair_restore_temp")
-    if temp_dir.exists():
-        print("  - Cleaning up existing temporary files...")
-        shutil.rmtree(temp_dir)
-    temp_dir.mkdir()
-    print("✓ Workspace prepared")
+    # Set up web app destination path
+    if not web_app_dest:
+        web_app_dest = Path(GLOBAL_CONFIG.get("WEB_APP", "web_app_path"))
+    else:
+        web_app_dest = Path(web_app_dest)
 
+    temp_dir = None
     restored_web_app_path = None
+    npm_install_process = None
 
     try:
-        # Extract the tarball using lz4 module
+        # Create a private (mode 0700) temporary directory for extraction. When the web app is restored,
+        # it lives in the web app destination: its mode keeps it from being served, and the extracted
+        # web app can be renamed into place. Workspaces left behind by interrupted runs are removed first.
+        print("\nPreparing temporary workspace...")
+        workspace_parent = Path(tempfile.gettempdir()) if skip_web_app else web_app_dest
+        workspace_parent.mkdir(parents=True, exist_ok=True)
+        for stale_dir in workspace_parent.glob(".textpair_restore_*"):
+            print(f"  - Cleaning up existing temporary files in {stale_dir}...")
+            shutil.rmtree(stale_dir)
+        temp_dir = Path(tempfile.mkdtemp(dir=workspace_parent, prefix=".textpair_restore_"))
+        print("✓ Workspace prepared")
+
+        # Extract the LZ4-compressed tarball
         print("\nExtracting backup archive...")
-        print("  - Decompressing with LZ4...")
-        with open(backup_path, 'rb') as f:
-            compressed_data = f.read()
-        decompressed_data = lz4.frame.decompress(compressed_data)
-        print("  - Extracting files...")
-        temp_tar = temp_dir / "temp.tar"
-        with open(temp_tar, 'wb') as f:
-            f.write(decompressed_data)
-        os.system(f"tar xf {temp_tar} -C {temp_dir}")
-        os.remove(temp_tar)
+        print("  - Decompressing with LZ4 and extracting files...")
+        # Stream the decompressed archive straight into tarfile so the full tarball is never held in memory.
+        # If the backup came with a checksum, the archive is hashed during that same pass.
+        expected_checksum = checksum_path.read_text().strip() if checksum_path.exists() else None
+        with open_backup_stream(backup_path) as backup_stream:
+            if expected_checksum is not None:
+                backup_stream = HashingReader(backup_stream)
+            with tarfile.open(fileobj=backup_stream, mode='r|', bufsize=TAR_BUFFER_SIZE) as tar:
+                if skip_web_app:
+                    # Keep the backup root and the files directly inside it (table dumps, schema fingerprints).
+                    # Skipped members are passed over as the stream advances.
+                    members = (
+                        member for member in tar
+                        if len(PurePosixPath(member.name).parts) == 1
+                        or (len(PurePosixPath(member.name).parts) == 2 and member.isfile())
+                    )
+                else:
+                    members = tar
+                extract_members(tar, temp_dir, members)
+            if expected_checksum is not None:
+                backup_stream.drain()
+                if backup_stream.hexdigest() != expected_checksum:
+                    raise Exception(f"Backup archive does not match its checksum in {checksum_path}")
         print("✓ Backup extracted successfully")
+        if expected_checksum is not None:
+            print("✓ Backup checksum verified")
+
+        # The archive is no longer needed: evict it from the page cache before the restore and npm build
+        with open(backup_path, 'rb') as f:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        os.unlink(backup_path)
+        if checksum_path.exists():
+            os.unlink(checksum_path)
 
         backup_contents = list(temp_dir.iterdir())
         if not backup_contents:
@@ -195,16 +417,14 @@ def restore_textpair_database(backup_path, web_app_dest=None, force=False):
         if not backup_dir.is_dir():
             raise Exception("Unexpected backup structure")
 
-        # Set up web app destination path
-        if not web_app_dest:
-            web_app_dest = Path(GLOBAL_CONFIG.get("WEB_APP", "web_app_path"))
-        else:
-            web_app_dest = Path(web_app_dest)
+        dump_files, web_dirs = scan_backup_dir(backup_dir)
+        if not dump_files:
+            raise Exception("No table dumps found in backup")
 
         # Check for existing resources
         if not force:
             print("\nChecking for existing resources...")
-            existing = check_existing_resources(db_name, db_user, db_password, web_app_dest, backup_dir)
+            existing = check_existing_resources(conn, web_app_dest, dump_files, web_dirs)
             if existing:
                 print("\nWARNING: The following resources will be overwritten:")
                 for resource in existing:
@@ -215,44 +435,109 @@ def restore_textpair_database(backup_path, web_app_dest=None, force=False):
                     return
                 print("")  # Empty line for better readability
 
-        # Restore database tables
-        sql_files = list(backup_dir.glob("textpair_*.sql"))
-        if not sql_files:
-            raise Exception("No SQL files found in backup")
+        # Install the web app's dependencies in the workspace while the tables are restored.
+        # The existing web app is only replaced once the database restore has succeeded.
+        staged_web_app = None
+        if web_dirs:
+            staged_web_app = web_dirs[0]
+            print("\nInstalling web application dependencies in the background...")
+            npm_install_process = subprocess.Popen(['npm', 'install'], cwd=staged_web_app)
 
+        # Restore database tables
         print("\nRestoring database tables...")
-        print(f"Found {len(sql_files)} tables to restore")
-
-        for sql_file in sql_files:
-            table_name = sql_file.stem.replace('textpair_', '')
-
-            # Drop existing table if it exists
-            print(f"  - Processing {table_name}:")
-            print(f"    • Dropping existing table if present...")
-            with psycopg2.connect(database=db_name, user=db_user, password=db_password) as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(f"DROP TABLE IF EXISTS {table_name} CASCADE")
-                conn.commit()
+        print(f"Found {len(dump_files)} tables to restore")
+
+        # Tables whose schema matches the backup are truncated and reloaded, the others are dropped and recreated
+        fingerprints_path = backup_dir / SCHEMA_FINGERPRINTS_FILE
+        backup_fingerprints = {}
+        if fingerprints_path.exists():
+            fingerprints = orjson.loads(fingerprints_path.read_bytes())
+            if fingerprints.get("version") == SCHEMA_FINGERPRINT_VERSION:
+                backup_fingerprints = fingerprints["tables"]
+            else:
+                print("  - Backup schema fingerprints use a different format, all tables will be recreated")
+        truncated_files = set()
+        truncated_tables = []
+        index_definitions = {}
+        dropped_tables = []
+        with conn.cursor() as cursor:
+            for dump_file in dump_files:
+                table_name = dump_file.stem.replace('textpair_', '')
+                if (
+                    dump_file.suffix == ".dump"
+                    and table_name in backup_fingerprints
+                    and table_schema_fingerprint(cursor, table_name) == backup_fingerprints[table_name]
+                ):
+                    truncated_files.add(dump_file)
+                    truncated_tables.append(table_name)
+                else:
+                    dropped_tables.append(table_name)
+
+            if truncated_tables:
+                # Secondary indexes are dropped and rebuilt after the load, as a full restore would
+                print("  - Dropping secondary indexes of tables with an unchanged schema...")
+                index_names = []
+                for dump_file in truncated_files:
+                    indexes = secondary_indexes(cursor, dump_file.stem.replace('textpair_', ''))
+                    index_names.extend(index_name for index_name, _ in indexes)
+                    index_definitions[dump_file] = [index_definition for _, index_definition in indexes]
+                if index_names:
+                    cursor.execute(
+                        sql.SQL("DROP INDEX {}").format(
+                            sql.SQL(", ").join(sql.Identifier(index_name) for index_name in index_names)
+                        )
+                    )
+                print("  - Truncating existing tables with an unchanged schema...")
+                cursor.execute(
+                    sql.SQL("TRUNCATE {} RESTART IDENTITY CASCADE").format(
+                        sql.SQL(", ").join(sql.Identifier(table_name) for table_name in truncated_tables)
+                    )
+                )
+            if dropped_tables:
+                print("  - Dropping existing tables if present...")
+                cursor.execute(
+                    sql.SQL("DROP TABLE IF EXISTS {} CASCADE").format(
+                        sql.SQL(", ").join(sql.Identifier(table_name) for table_name in dropped_tables)
+                    )
+                )
 
-            # Restore table
-            print(f"    • Restoring table data...")
-            os.system(f'PGPASSWORD={db_password} psql -U {db_user} -d {db_name} -f {sql_file}')
-            print(f"    ✓ Table {table_name} restored")
+        # Tables are independent, so restore them concurrently
+        with ThreadPoolExecutor(max_workers=min(len(dump_files), os.cpu_count() or 1)) as executor:
+            list(executor.map(
+                lambda dump_file: restore_table(
+                    dump_file,
+                    db_name,
+                    db_user,
+                    db_password,
+                    data_only=dump_file in truncated_files,
+                    index_definitions=index_definitions.get(dump_file, ()),
+                ),
+                dump_files,
+            ))
 
         print("✓ Database restoration complete")
 
         # Restore web app files
-        web_dirs = [d for d in backup_dir.iterdir() if d.is_dir()]
-        if web_dirs:
-            web_app_dir = web_dirs[0]
-            web_app_dest = web_app_dest / web_app_dir.name
+        if staged_web_app:
+            web_app_dest = web_app_dest / staged_web_app.name
+
+            # npm install writes into the staged web app, so it must finish before the web app is moved
+            npm_install_process.wait()
 
             if web_app_dest.exists():
                 print(f"\nRemoving existing web application at {web_app_dest}...")
                 shutil.rmtree(web_app_dest)
 
-            print(f"Copying web application files...")
-            shutil.copytree(web_app_dir, web_app_dest)
+            print(f"\nMoving web application files...")
+            try:
+                # The workspace is in the destination directory, so this is a metadata-only rename
+                os.rename(staged_web_app, web_app_dest)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                print("  - Destination is on another filesystem, copying files...")
+                # Keep node_modules/.bin symlinks as links so the installed tools still resolve their packages
+                shutil.copytree(staged_web_app, web_app_dest, symlinks=True, copy_function=reflink_copy)
             restored_web_app_path = web_app_dest
             print("✓ Web application files restored")
 
@@ -266,8 +551,7 @@ def restore_textpair_database(backup_path, web_app_dest=None, force=False):
             print("✓ Configuration updated")
 
             print("\nRebuilding web application...")
-            print("  - Installing dependencies...")
-            if run_npm_build(restored_web_app_path):
+            if run_npm_build(restored_web_app_path, npm_install_process):
                 print("✓ Web application rebuilt successfully")
             else:
                 print("✗ Failed to rebuild web application")
@@ -275,15 +559,19 @@ def restore_textpair_database(backup_path, web_app_dest=None, force=False):
                     raise Exception("Web application build failed")
 
         print("\n✓ Restore completed successfully!")
-        db_url = Path(GLOBAL_CONFIG.get("WEB_APP", "api_server").replace("-api", "")) / web_app_dest.name
-        print(f"The database is viewable at: {db_url}")
+        if restored_web_app_path:
+            db_url = Path(GLOBAL_CONFIG.get("WEB_APP", "api_server").replace("-api", "")) / web_app_dest.name
+            print(f"The database is viewable at: {db_url}")
 
     finally:
         # Clean up
         print("\nCleaning up...")
-        if temp_dir.exists():
+        conn.close()
+        if npm_install_process is not None and npm_install_process.poll() is None:
+            npm_install_process.kill()
+            npm_install_process.wait()
+        if temp_dir is not None and temp_dir.exists():
             shutil.rmtree(temp_dir)
-        os.remove(backup_path)
         print("✓ Cleanup completed")
 
 
@@ -294,6 +582,8 @@ if __name__ == "__main__":
                       help="Optional destination path for web app files")
     parser.add_argument("--force", action="store_true",
                       help="Overwrite existing files/tables without prompting")
+    parser.add_argument("--skip_web_app", action="store_true",
+                      help="Only restore the database tables, without extracting or rebuilding the web app")
     args = parser.parse_args()
 
-    restore_textpair_database(args.backup_path, args.web_app_dest, args.force)
\ No newline at end of file
+    restore_textpair_database(args.backup_path, args.web_app_dest, args.force, args.skip_web_app)
\ No newline at end of file